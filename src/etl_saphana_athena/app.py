@@ -14,6 +14,7 @@ from textual.widgets import (
     DataTable,
     ProgressBar,
     Digits,
+    Static,
 )
 from textual.containers import (
     VerticalGroup,
@@ -30,9 +31,20 @@ from textual.reactive import reactive
 from itertools import count
 from typing import Literal
 from etl_saphana_athena.config import create_config, load_config
-from etl_saphana_athena.load import write_parquet
+from etl_saphana_athena.load import shutdown_process_pool
+from etl_saphana_athena.batch import (
+    ExportJob,
+    expand_jobs,
+    load_history,
+    load_stats,
+    run_batch,
+)
+from etl_saphana_athena.history import print_history
+from etl_saphana_athena.monitor import Monitor, TableProgress
 from time import monotonic
 from rich.markup import escape
+from rich.table import Table
+import argparse
 
 LIST_ATHENA = ["replace", "append", "merge"]
 
@@ -57,6 +69,9 @@ LIST_REGION = [
     "cn-northwest-1",
 ]
 
+# NOTE: taxa fixa de redesenho do painel e do cronometro
+REFRESH = 1 / 4
+
 CON_MARKDOWN = """\
 # Conexao SAP/ATHENA
 
@@ -85,6 +100,19 @@ Informe as tabelas que serão exportadas pro `ATHENA`.
 - (AWS) schema
 - (AWS) table name
 - (AWS) append/replace/merge
+
+## Schema inteiro
+
+Em `sap table name` use padroes glob separados
+por virgula, `!` exclui: `vbak*, vbap*, !*_old`.
+
+Em `aws table name` o `*` recebe o nome da
+tabela SAP: `sap_*`.
+
+## Consulta SQL
+
+Em `sap schema` use `query` e em `sap table name`
+o nome da consulta da secao `queries`.
 """
 
 
@@ -94,15 +122,15 @@ class TimeDisplay(Digits):
     total = reactive(0.0)
 
     def on_mount(self) -> None:
-        self.update_timer = self.set_interval(1 / 60, self.update_time, pause=True)
+        self.update_timer = self.set_interval(REFRESH, self.update_time, pause=True)
 
     def update_time(self) -> None:
         self.time = self.total + (monotonic() - self.start_time)
 
     def watch_time(self, time: float) -> None:
-        minutes, seconds = divmod(time, 60)
+        minutes, seconds = divmod(int(time), 60)
         hours, minutes = divmod(minutes, 60)
-        self.update(f"{hours:02,.0f}:{minutes:02.0f}:{seconds:05.2f}")
+        self.update(f"{hours:02,}:{minutes:02}:{seconds:02}")
 
     def start(self) -> None:
         self.start_time = monotonic()
@@ -118,6 +146,34 @@ class TimeDisplay(Digits):
         self.time = 0
 
 
+class Dashboard(Static):
+    """Tabelas ativas: etapa, linhas/s, MB/s e sparkline da vazao recente."""
+
+    def show(self, tables: list[TableProgress]) -> None:
+        dashboard = Table(
+            "tabela",
+            "etapa",
+            "linhas",
+            "linhas/s",
+            "MB/s",
+            "vazao",
+            expand=True,
+            box=None,
+        )
+
+        for table in tables:
+            dashboard.add_row(
+                escape(table.name),
+                escape(table.stage),
+                f"{table.rows:,}",
+                f"{table.rows_per_s:,.0f}",
+                f"{table.bytes_per_s / 1024**2:,.1f}",
+                table.sparkline(),
+            )
+
+        self.update(dashboard)
+
+
 class YesOrNo(ModalScreen):
     DEFAULT_CSS = """
         YesOrNo {
@@ -218,6 +274,52 @@ class DialogScreen(ModalScreen):
         self.app.pop_screen()
 
 
+class ReportScreen(ModalScreen):
+    """Screen with the full run report, scrollable."""
+
+    DEFAULT_CSS = """
+        ReportScreen {
+            align: center middle;
+        }
+
+        #report {
+            padding: 0 1;
+            width: 100;
+            height: 80%;
+            border: thick $background 80%;
+            background: $surface;
+        }
+
+        #report-title {
+            width: 1fr;
+            content-align: center middle;
+        }
+
+        #report-lines {
+            height: 1fr;
+        }
+
+        #report-ok {
+            width: 1fr;
+        }
+    """
+
+    def __init__(self, report: list[str]) -> None:
+        super().__init__()
+        self.report = report
+
+    def compose(self) -> ComposeResult:
+        with Container(id="report"):
+            yield Label(f"Relatorio: {len(self.report)} avisos", id="report-title")
+            with VerticalScroll(id="report-lines"):
+                yield Static("\n".join(self.report), markup=False)
+            yield Button("OK", variant="warning", id="report-ok")
+
+    @on(Button.Pressed, "#report-ok")
+    def remove_screen(self) -> None:
+        self.app.pop_screen()
+
+
 class Sidebar(VerticalGroup):
     def compose(self) -> ComposeResult:
         yield Button("CONFIGURAR", id="connector", variant="success")
@@ -444,6 +546,10 @@ class ListTables(VerticalGroup):
             color: $foreground-muted;
             height: 3;
         }
+        Dashboard {
+            height: auto;
+            margin: 1;
+        }
     """
 
     COLUMNS = (
@@ -498,9 +604,22 @@ class ListTables(VerticalGroup):
                     yield TimeDisplay()
 
                 with Center():
-                    self.progress_bar = ProgressBar(id="progress", show_eta=False)
+                    self.progress_bar = ProgressBar(id="progress")
                     yield self.progress_bar
                     yield Label(id="status")
+                    yield Label(id="eta")
+
+                yield Dashboard()
+
+    def on_mount(self) -> None:
+        self.monitor = Monitor()
+        self.dashboard_timer = self.set_interval(
+            REFRESH, self.refresh_dashboard, pause=True
+        )
+
+    def refresh_dashboard(self) -> None:
+        self.query_one(Dashboard).show(self.monitor.sample())
+        self.progress_bar.update(progress=self.monitor.rows)
 
     @on(Input.Changed)
     def lower(self, event: Input.Changed) -> None:
@@ -515,27 +634,42 @@ class ListTables(VerticalGroup):
         display.start()
 
         try:
-            progress_bar.total = table.row_count
-            progress_bar.progress = 0
             status = self.query_one("#status", Label)
 
-            for index in range(table.row_count):
-                __, schema, table_name, aws_schema, aws_table_name, aws_operation = (
-                    table.get_row_at(index)
-                )
-
-                await write_parquet(
-                    table_name,
-                    schema,
-                    status,
-                    aws_schema,
-                    aws_table_name,
-                    aws_operation,
-                )
-                progress_bar.advance(index + 1)
+            jobs = [
+                ExportJob(*table.get_row_at(index)[1:])
+                for index in range(table.row_count)
+            ]
+
+            status.update("SAP: Catalogo dos schemas ...")
+            jobs = await expand_jobs(jobs)
+
+            status.update("SAP: Estatisticas das tabelas ...")
+            await load_stats(jobs)
+            await load_history(jobs)
+
+            # NOTE: total em linhas, ETA calculado pelo ProgressBar
+            progress_bar.update(
+                total=sum(job.rows for job in jobs) or None, progress=0
+            )
+
+            # NOTE: pipeline so agrega eventos, a tela le o monitor a 4 Hz
+            self.monitor = Monitor()
+            self.dashboard_timer.resume()
+
+            eta = self.query_one("#eta", Label)
+            report = await run_batch(jobs, status, self.monitor, eta=eta)
+
+            if progress_bar.total is not None:
+                progress_bar.update(progress=progress_bar.total)
+
+            if report:
+                self.app.push_screen(ReportScreen(report))
         except Exception as e:
             self.app.push_screen(DialogScreen(escape(str(e)), variant="error"))
         finally:
+            self.dashboard_timer.pause()
+            self.query_one(Dashboard).show(self.monitor.sample())
             btn.loading = False
             table.loading = False
             display.stop()
@@ -663,5 +797,21 @@ class EtlSaphanaAthenaApp(App):
 
 
 def main():
+    parser = argparse.ArgumentParser(prog="export")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=["history"],
+        help="history: historico das exportacoes e estimativas por tabela",
+    )
+    args = parser.parse_args()
+
+    if args.command == "history":
+        print_history()
+        return
+
     app = EtlSaphanaAthenaApp()
-    app.run()
+    try:
+        app.run()
+    finally:
+        shutdown_process_pool()
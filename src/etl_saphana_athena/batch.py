@@ -0,0 +1,381 @@
+from dataclasses import dataclass
+from typing import Literal
+from textual.widgets import Label
+from etl_saphana_athena.config import load_options, load_table_options, load_query
+from etl_saphana_athena.monitor import Monitor
+from etl_saphana_athena.history import (
+    Baseline,
+    async_baselines,
+    async_record,
+    fmt_seconds,
+    regression,
+)
+from etl_saphana_athena.load import (
+    async_do_connect,
+    async_get_query_columns,
+    async_get_schema_catalog,
+    async_get_table_stats,
+    async_maintain_table,
+    athena_name,
+    build_schema,
+    build_stmt,
+    normalize_name,
+    write_parquet,
+)
+from collections import deque
+from datetime import datetime
+from time import monotonic
+import pyarrow as pa
+import asyncio
+import heapq
+
+
+# NOTE: `sap schema` reservado, `sap table` e o nome na secao `queries`
+QUERY_SCHEMA = "query"
+
+
+@dataclass
+class ExportJob:
+    schema: str
+    table_name: str
+    aws_schema: str
+    aws_table_name: str
+    aws_operation: Literal["replace", "append", "merge"]
+    rows: int = 0
+    size: int = 0
+    dtype_arrow: pa.Schema | None = None
+    stmt: str | None = None
+    baseline: Baseline | None = None
+
+    @property
+    def eta(self) -> float | None:
+        return self.baseline.estimate(self.rows) if self.baseline else None
+
+
+def is_pattern(table_name: str) -> bool:
+    return any(char in table_name for char in "*?[!,")
+
+
+def parse_patterns(table_name: str) -> tuple[list[str], list[str]]:
+    """`vbak*, vbap*, !*_old` => (['vbak*', 'vbap*'], ['*_old'])"""
+    patterns = [pattern.strip() for pattern in table_name.split(",")]
+
+    include = [pattern for pattern in patterns if pattern and pattern[0] != "!"]
+    exclude = [pattern[1:] for pattern in patterns if pattern[:1] == "!"]
+
+    return include or ["*"], exclude
+
+
+def aws_name(template: str, table_name: str) -> str:
+    # NOTE: `*` recebe o nome da tabela SAP, sem `*` o template e prefixo
+    if "*" in template:
+        return template.replace("*", table_name)
+
+    return f"{template}{table_name}"
+
+
+def is_query(job: ExportJob) -> bool:
+    return job.schema == QUERY_SCHEMA
+
+
+async def expand_jobs(jobs: list[ExportJob]) -> list[ExportJob]:
+    """Troca jobs de schema (padroes glob) por um job por tabela encontrada.
+
+    Tabelas e colunas de cada schema vem de uma unica consulta no catalogo,
+    ja com schema Arrow e select prontos. Jobs de consulta recebem o SQL
+    da secao `queries` e o schema Arrow do metadata do result set.
+    """
+    if not any(is_pattern(job.table_name) or is_query(job) for job in jobs):
+        return jobs
+
+    engine = await async_do_connect()
+    expanded = list()
+
+    for job in jobs:
+        if is_query(job):
+            if (query := load_query(job.table_name)) is None:
+                raise ValueError(f"Consulta nao existe: {job.table_name}")
+
+            job.stmt = query
+            job.dtype_arrow = await async_get_query_columns(engine, query)
+            expanded.append(job)
+            continue
+
+        if not is_pattern(job.table_name):
+            expanded.append(job)
+            continue
+
+        include, exclude = parse_patterns(job.table_name)
+        catalog = await async_get_schema_catalog(engine, job.schema, include, exclude)
+
+        for table_name, columns in catalog.items():
+            name = normalize_name(table_name)
+            expanded.append(
+                ExportJob(
+                    job.schema,
+                    name,
+                    job.aws_schema,
+                    aws_name(job.aws_table_name, athena_name(name)),
+                    job.aws_operation,
+                    dtype_arrow=build_schema(
+                        [(athena_name(col), type_) for col, type_ in columns],
+                        f"{job.schema}.{name}",
+                    ),
+                    stmt=build_stmt(columns, table_name, job.schema),
+                )
+            )
+
+    return expanded
+
+
+async def load_stats(jobs: list[ExportJob]) -> None:
+    """Preenche linhas/memoria estimadas de todos os jobs com uma consulta."""
+    engine = await async_do_connect()
+
+    try:
+        stats = await async_get_table_stats(
+            engine,
+            [(job.schema, job.table_name) for job in jobs if not is_query(job)],
+        )
+    except ValueError:
+        # NOTE: sem acesso a M_TABLES, mantem a ordem de insercao
+        stats = dict()
+
+    for job in jobs:
+        job.rows, job.size = stats.get((job.schema, job.table_name), (0, 0))
+
+
+async def load_history(jobs: list[ExportJob]) -> None:
+    history = await async_baselines([(job.schema, job.table_name) for job in jobs])
+
+    for job in jobs:
+        job.baseline = history.get((job.schema, job.table_name))
+
+        # NOTE: consulta nao tem M_TABLES, linhas estimadas pelo historico
+        if is_query(job) and job.baseline is not None:
+            job.rows = job.baseline.rows
+
+
+def batch_eta(pending: list[float], slots: int, loads: list[float] = ()) -> float:
+    """Simula a fila (maior primeiro) nos slots, a partir da carga atual de cada um."""
+    loads = list(loads) + [0.0] * max(0, slots - len(loads))
+    heapq.heapify(loads)
+
+    for seconds in pending:
+        heapq.heappush(loads, heapq.heappop(loads) + seconds)
+
+    return max(loads, default=0.0)
+
+
+def schedule(jobs: list[ExportJob]) -> list[ExportJob]:
+    # NOTE: maiores primeiro, evita uma tabela grande no final da fila;
+    # consultas tem custo desconhecido no HANA e tambem vao na frente
+    return sorted(
+        jobs, key=lambda job: (is_query(job), job.size, job.rows), reverse=True
+    )
+
+
+def target(job: ExportJob) -> tuple[str, str]:
+    return job.aws_schema, job.aws_table_name
+
+
+def next_job(
+    queue: deque[ExportJob], targets: set[tuple[str, str]]
+) -> ExportJob | None:
+    """Retira da fila o primeiro job cujo destino nao esta em uso."""
+    for job in queue:
+        if target(job) not in targets:
+            queue.remove(job)
+            return job
+
+    return None
+
+
+def first_exception(e: BaseException) -> BaseException:
+    while isinstance(e, BaseExceptionGroup):
+        e = e.exceptions[0]
+
+    return e
+
+
+async def run_batch(
+    jobs: list[ExportJob],
+    status: Label,
+    monitor: Monitor | None = None,
+    slots: int | None = None,
+    eta: Label | None = None,
+) -> list[str]:
+    """Executa os jobs e retorna o relatorio (divergencias e quedas de vazao)."""
+    if slots is None:
+        slots = int(load_options().get("slots", 1))
+    slots = max(1, min(slots, len(jobs)))
+
+    queue = deque(schedule(jobs))
+    running = dict()
+
+    # NOTE: athena_mvsh usa `temp_<tabela>` fixo, um job por destino por vez
+    targets = set()
+    released = asyncio.Event()
+
+    # NOTE: manutencao roda no Athena, fila propria fora dos slots de extracao;
+    # uma vez por destino, depois do ultimo job dele
+    maintenance = asyncio.Queue()
+    pending = dict()
+    report = list()
+    done = asyncio.Event()
+    finished = 0
+
+    def update_status() -> None:
+        status.update(f"Lote: {finished}/{len(jobs)} tabelas concluidas")
+
+    def update_eta() -> None:
+        now = monotonic()
+        active = list(running.values())
+
+        loads = [max(0.0, (job.eta or 0.0) - (now - start)) for job, start in active]
+        pending = [job.eta or 0.0 for job in queue]
+        unknown = any(job.eta is None for job in [*queue, *(job for job, __ in active)])
+
+        tables = ", ".join(
+            f"{job.table_name} {fmt_seconds(load if job.eta is not None else None)}"
+            for (job, __), load in zip(active, loads)
+        )
+        eta.update(
+            f"ETA lote: {fmt_seconds(batch_eta(pending, slots, loads))}"
+            f"{' +?' if unknown else ''} | {tables}"
+        )
+
+    async def ticker() -> None:
+        while not done.is_set():
+            update_eta()
+            await asyncio.sleep(1)
+
+    async def worker() -> None:
+        nonlocal finished
+
+        while queue:
+            if (job := next_job(queue, targets)) is None:
+                released.clear()
+                await released.wait()
+                continue
+
+            targets.add(target(job))
+            started_at, running[id(job)] = datetime.now(), (job, monotonic())
+
+            job_status, progress = status, None
+            if monitor is not None:
+                name = f"{job.aws_schema}.{job.aws_table_name}"
+                job_status = monitor.start(id(job), name)
+                progress = monitor.progress(id(job))
+
+            try:
+                result = await write_parquet(
+                    job.table_name,
+                    job.schema,
+                    job_status,
+                    job.aws_schema,
+                    job.aws_table_name,
+                    job.aws_operation,
+                    progress=progress,
+                    dtype_arrow=job.dtype_arrow,
+                    stmt=job.stmt,
+                )
+            except Exception as e:
+                await async_record(
+                    job.schema,
+                    job.table_name,
+                    job.aws_schema,
+                    job.aws_table_name,
+                    started_at,
+                    outcome="error",
+                    error=str(e),
+                )
+                raise
+            finally:
+                running.pop(id(job))
+                targets.discard(target(job))
+                released.set()
+                if monitor is not None:
+                    monitor.finish(id(job))
+
+            await async_record(
+                job.schema,
+                job.table_name,
+                job.aws_schema,
+                job.aws_table_name,
+                started_at,
+                result.rows,
+                result.bytes,
+                result.stages,
+            )
+
+            finished += 1
+            update_status()
+
+            report.extend(result.mismatches)
+
+            policy = load_options().get("lob_policy", "truncate")
+            for column, values in result.lobs.items():
+                report.append(
+                    f"{job.aws_schema}.{job.aws_table_name}: LOB {column} "
+                    f"acima de lob_max_mb, {values} valores ({policy})"
+                )
+
+            extract_s = result.stages["extract"]
+            if warning := regression(job.baseline, result.rows, extract_s):
+                report.append(f"{job.aws_schema}.{job.aws_table_name}: {warning}")
+
+            options = load_table_options(job.aws_schema, job.aws_table_name)
+            if "maintenance" in options:
+                pending[target(job)] = (job, options["maintenance"])
+
+            queue_maintenance()
+
+    def queue_maintenance() -> None:
+        busy = {target(job) for job in queue}
+        busy |= {target(job) for job, __ in running.values()}
+
+        for key in [key for key in pending if key not in busy]:
+            # NOTE: destino reservado, nenhum job grava durante OPTIMIZE/VACUUM
+            targets.add(key)
+            maintenance.put_nowait(pending.pop(key))
+
+    async def maintainer() -> None:
+        while (item := await maintenance.get()) is not None:
+            job, options = item
+            # NOTE: manutencao e opcional, erro vai para o relatorio sem abortar a carga
+            try:
+                executed = await async_maintain_table(
+                    job.aws_table_name, job.aws_schema, options
+                )
+            except ValueError as e:
+                report.append(f"{job.aws_schema}.{job.aws_table_name}: manutencao {e}")
+                continue
+            finally:
+                targets.discard(target(job))
+                released.set()
+
+            status.update(
+                f"ATHENA: {job.aws_table_name} - {', '.join(executed) or 'OK'}"
+            )
+
+    update_status()
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            group.create_task(maintainer())
+            if eta is not None:
+                group.create_task(ticker())
+
+            try:
+                async with asyncio.TaskGroup() as extract:
+                    for __ in range(slots):
+                        extract.create_task(worker())
+            finally:
+                done.set()
+
+            maintenance.put_nowait(None)
+    except ExceptionGroup as e:
+        raise first_exception(e)
+
+    return report
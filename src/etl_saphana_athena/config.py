@@ -1,4 +1,5 @@
 from pathlib import Path
+from fnmatch import fnmatch
 import json
 
 HOME = Path.home()
@@ -6,6 +7,9 @@ FILE = HOME.joinpath(".export.json")
 
 
 def create_config(config: dict):
+    # NOTE: preserva secoes extras (export, tables, ...) editadas a mao
+    data = load_config()
+
     with FILE.open("w", encoding="utf_8") as f:
         
         sap = {}
@@ -17,7 +21,7 @@ def create_config(config: dict):
             else:
                 athena[k] = v
         
-        data = dict(sap=sap, athena=athena)
+        data |= dict(sap=sap, athena=athena)
         json.dump(data, f, indent=4)
 
 
@@ -27,3 +31,33 @@ def load_config() -> dict:
             return json.load(f)
 
     return dict()
+
+
+def load_options() -> dict:
+    return load_config().get("export", dict())
+
+
+def load_table_options(aws_schema: str, aws_table_name: str) -> dict:
+    """Opcoes da secao `tables`, chave `aws_schema.aws_table` (aceita glob)."""
+    tables = load_config().get("tables", dict())
+    name = f"{aws_schema}.{aws_table_name}"
+
+    if name in tables:
+        return tables[name]
+
+    for pattern, options in tables.items():
+        if fnmatch(name, pattern):
+            return options
+
+    return dict()
+
+
+def load_query(name: str) -> str | None:
+    """SQL da secao `queries` (consulta livre ou calculation view)."""
+    queries = load_config().get("queries", dict())
+    queries = {key.lower(): query for key, query in queries.items()}
+
+    if query := queries.get(name.lower()):
+        return query.strip().rstrip(";")
+
+    return None
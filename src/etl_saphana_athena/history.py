@@ -0,0 +1,208 @@
+from etl_saphana_athena.config import HOME, load_options
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime
+from statistics import median
+from rich.console import Console
+from rich.table import Table
+from functools import partial
+import asyncio
+import sqlite3
+
+
+FILE = HOME.joinpath(".export.db")
+
+# NOTE: ultimas execucoes com sucesso usadas como baseline
+HISTORY = 10
+
+# NOTE: extracoes curtas demais nao servem para medir vazao
+MIN_SECONDS = 10
+
+STAGES = ("extract", "upload", "reconcile")
+
+
+@dataclass
+class Baseline:
+    rows_per_s: float
+    overhead_s: float
+    seconds: float
+    runs: int
+    rows: int = 0
+
+    def estimate(self, rows: int) -> float:
+        if rows and self.rows_per_s:
+            return rows / self.rows_per_s + self.overhead_s
+
+        return self.seconds
+
+
+def connect() -> sqlite3.Connection:
+    con = sqlite3.connect(FILE)
+    con.execute(
+        """
+        create table if not exists runs (
+            id integer primary key autoincrement,
+            started_at text not null,
+            sap_schema text not null,
+            sap_table text not null,
+            aws_schema text not null,
+            aws_table text not null,
+            rows integer not null default 0,
+            bytes integer not null default 0,
+            extract_s real,
+            upload_s real,
+            reconcile_s real,
+            total_s real,
+            outcome text not null,
+            error text
+        )
+        """
+    )
+    con.execute(
+        "create index if not exists runs_table on runs (sap_schema, sap_table, id)"
+    )
+    return con
+
+
+def record(
+    sap_schema: str,
+    sap_table: str,
+    aws_schema: str,
+    aws_table: str,
+    started_at: datetime,
+    rows: int = 0,
+    bytes_: int = 0,
+    stages: dict[str, float] | None = None,
+    outcome: str = "ok",
+    error: str | None = None,
+) -> None:
+    stages = stages or dict()
+
+    with closing(connect()) as con, con:
+        con.execute(
+            """
+            insert into runs (
+                started_at, sap_schema, sap_table, aws_schema, aws_table,
+                rows, bytes, extract_s, upload_s, reconcile_s, total_s,
+                outcome, error
+            ) values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                started_at.isoformat(timespec="seconds"),
+                sap_schema,
+                sap_table,
+                aws_schema,
+                aws_table,
+                rows,
+                bytes_,
+                *[stages.get(stage) for stage in STAGES],
+                sum(stages.values()) if stages else None,
+                outcome,
+                error,
+            ),
+        )
+
+
+def baselines(
+    tables: list[tuple[str, str]],
+) -> dict[tuple[str, str], Baseline]:
+    """Baseline (medianas das ultimas execucoes com sucesso) de cada tabela."""
+    if not FILE.exists():
+        return dict()
+
+    result = dict()
+    with closing(connect()) as con:
+        for sap_schema, sap_table in set(tables):
+            response = con.execute(
+                """
+                select rows, extract_s, total_s
+                from runs
+                where sap_schema = ? and sap_table = ? and outcome = 'ok'
+                order by id desc
+                limit ?
+                """,
+                (sap_schema, sap_table, HISTORY),
+            ).fetchall()
+
+            if not response:
+                continue
+
+            speeds = [rows / extract for rows, extract, __ in response if extract]
+            result[(sap_schema, sap_table)] = Baseline(
+                rows_per_s=median(speeds) if speeds else 0.0,
+                overhead_s=median(total - extract for __, extract, total in response),
+                seconds=median(total for *__, total in response),
+                runs=len(response),
+                rows=int(median(rows for rows, *__ in response)),
+            )
+
+    return result
+
+
+async def async_record(*args, **kwargs) -> None:
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, partial(record, *args, **kwargs))
+
+
+async def async_baselines(
+    tables: list[tuple[str, str]],
+) -> dict[tuple[str, str], Baseline]:
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, baselines, tables)
+
+
+def regression(baseline: Baseline | None, rows: int, extract_s: float) -> str | None:
+    """Alerta quando a vazao cai abaixo de `regression_ratio` x baseline."""
+    if baseline is None or not baseline.rows_per_s or extract_s < MIN_SECONDS:
+        return None
+
+    ratio = float(load_options().get("regression_ratio", 0.5))
+    speed = rows / extract_s
+
+    if speed < ratio * baseline.rows_per_s:
+        return (
+            f"vazao {speed:,.0f} linhas/s, "
+            f"historico {baseline.rows_per_s:,.0f} linhas/s"
+        )
+
+    return None
+
+
+def fmt_seconds(seconds: float | None) -> str:
+    if seconds is None:
+        return "--:--:--"
+
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02,}:{minutes:02}:{seconds:02}"
+
+
+def print_history() -> None:
+    """Resumo por tabela para o terminal: ultima execucao, vazao e estimativa."""
+    table = Table("sap table", "ultima", "status", "linhas", "linhas/s", "estimativa")
+
+    if FILE.exists():
+        with closing(connect()) as con:
+            response = con.execute(
+                """
+                select sap_schema, sap_table, started_at, outcome, rows
+                from runs
+                where id in (select max(id) from runs group by sap_schema, sap_table)
+                order by sap_schema, sap_table
+                """
+            ).fetchall()
+
+        history = baselines([(schema, name) for schema, name, *__ in response])
+
+        for sap_schema, sap_table, started_at, outcome, rows in response:
+            baseline = history.get((sap_schema, sap_table))
+            table.add_row(
+                f"{sap_schema}.{sap_table}",
+                started_at,
+                outcome,
+                f"{rows:,}",
+                f"{baseline.rows_per_s:,.0f}" if baseline else "-",
+                fmt_seconds(baseline.estimate(rows) if baseline else None),
+            )
+
+    Console().print(table)
@@ -1,23 +1,52 @@
-from sqlalchemy import inspect, create_engine, URL
+from sqlalchemy import inspect, create_engine, URL, text, bindparam
 import sqlalchemy_hana.types as types
 from sqlalchemy.exc import NoSuchTableError
 from sqlalchemy.engine.base import Engine
-from etl_saphana_athena.config import load_config
+from etl_saphana_athena.config import load_config, load_options, load_table_options
+from etl_saphana_athena.reconcile import (
+    Metrics,
+    compare,
+    from_athena,
+    from_hana,
+    is_lob,
+)
 import pandas as pd
 import pyarrow.parquet as pq
 import pyarrow as pa
 import tempfile
 import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from queue import Empty
 from functools import partial
-from textual.widgets import Label
-from athena_mvsh import Athena, CursorParquetDuckdb
-from typing import Literal
+from athena_mvsh import Athena, CursorParquetDuckdb, CursorPython
+from typing import Literal, Callable, Protocol
+from fnmatch import fnmatchcase
 import socket
+import re
+import os
+from dataclasses import dataclass, field
+from time import monotonic
 from rich.markup import escape
 
 
 CHUNK = 10_000
 
+# NOTE: tabelas com LOB, lotes menores e leitura do locator em pedacos
+LOB_ROWS = 1_000
+LOB_CHUNK = 1024 * 1024
+
+LOB_POLICY = Literal["truncate", "null", "error"]
+
+EXECUTOR = Literal["thread", "process"]
+
+POOL: ProcessPoolExecutor | None = None
+MANAGER = None
+
+# NOTE: espera maxima na fila de progresso antes de checar o worker
+POLL = 0.5
+
 MAP_TYPES = {
     types.BIGINT: pa.int64(),
     types.INTEGER: pa.int32(),
@@ -27,7 +56,9 @@ MAP_TYPES = {
     types.VARCHAR: pa.string(),
     types.CHAR: pa.string(),
     types.NVARCHAR: pa.string(),
-    types.CLOB: pa.string(),
+    types.CLOB: pa.large_string(),
+    types.NCLOB: pa.large_string(),
+    types.BLOB: pa.large_binary(),
     types.NCHAR: pa.string(),
     types.DOUBLE: pa.float64(),
     types.FLOAT: pa.float32(),
@@ -37,6 +68,67 @@ MAP_TYPES = {
     types.TIMESTAMP: pa.timestamp("ns"),
 }
 
+# NOTE: identity, year/month/day/hour(col), bucket/truncate(n, col)
+PARTITION_SPEC = re.compile(
+    r"^(?:(?P<column>\w+)"
+    r"|(?P<temporal>year|month|day|hour)\((?P<temporal_column>\w+)\)"
+    r"|(?P<transform>bucket|truncate)\(\d+,\s*(?P<transform_column>\w+)\))$",
+    re.I,
+)
+
+# NOTE: conjunto do fnmatch, `[abc]`, `[!abc]`, `[]a]`
+GLOB_SET = re.compile(r"\[!?\]?[^\]]*\]")
+
+# NOTE: DATA_TYPE_NAME de SYS.TABLE_COLUMNS
+MAP_TYPE_NAMES = {type_.__visit_name__: arrow for type_, arrow in MAP_TYPES.items()}
+
+# NOTE: type_code do cursor.description (hdbcli) => DATA_TYPE_NAME
+MAP_TYPE_CODES = {
+    1: "TINYINT",
+    2: "SMALLINT",
+    3: "INTEGER",
+    4: "BIGINT",
+    5: "DECIMAL",
+    6: "REAL",
+    7: "DOUBLE",
+    8: "CHAR",
+    9: "VARCHAR",
+    10: "NCHAR",
+    11: "NVARCHAR",
+    14: "DATE",
+    16: "TIMESTAMP",
+    25: "CLOB",
+    26: "NCLOB",
+    27: "BLOB",
+    28: "BOOLEAN",
+    29: "VARCHAR",
+    30: "NVARCHAR",
+    47: "DECIMAL",
+    61: "TIMESTAMP",
+    62: "TIMESTAMP",
+    63: "DATE",
+}
+
+
+class Status(Protocol):
+    """`Label` do textual ou qualquer objeto com `update(texto)`."""
+
+    def update(self, content: str) -> None: ...
+
+
+# NOTE: (linhas, bytes Arrow) de cada lote gravado
+Progress = Callable[[int, int], None]
+
+
+@dataclass
+class ExportResult:
+    rows: int = 0
+    bytes: int = 0
+    stages: dict[str, float] = field(default_factory=dict)
+    mismatches: list[str] = field(default_factory=list)
+    # NOTE: valores LOB acima de `lob_max_mb` (truncados/nulos) por coluna
+    lobs: dict[str, int] = field(default_factory=dict)
+
 
 def test_network_connectivity(host: str, port: str | int, timeout: int = 4) -> bool:
     try:
@@ -64,12 +156,7 @@ def create_stmt(con: Engine, table_name: str, schema: str) -> str:
         inspetor = inspect(con)
         response = inspetor.get_columns(table_name=table_name, schema=schema)
 
-        columns = [
-            f"TO_VARCHAR({row['name']}) AS {row['name']}"
-            if isinstance(row["type"], types.CLOB)
-            else f"{row['name']}"
-            for row in response
-        ]
+        columns = [row["name"] for row in response]
 
         return f"""select {",".join(columns)} from {schema}.{table_name}"""
     except Exception as e:
@@ -90,11 +177,339 @@ def get_columns(con: Engine, table_name: str, schema: str) -> pa.Schema:
         )
 
 
+def normalize_name(name: str) -> str:
+    # NOTE: mesmo criterio do sqlalchemy-hana, nome maiusculo vira minusculo
+    return name.lower() if name == name.upper() else name
+
+
+def athena_name(name: str) -> str:
+    # NOTE: Athena aceita so minusculas, numeros e `_` (`/BIC/ZMATNR` => `_bic_zmatnr`)
+    return re.sub(r"\W", "_", name.lower())
+
+
+def quote(name: str) -> str:
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+def like_pattern(pattern: str) -> str:
+    """Glob => LIKE com escape `\\`; conjunto `[...]` vira `_` (um caractere)."""
+    parts = [
+        part.replace("\\", "\\\\")
+        .replace("%", "\\%")
+        .replace("_", "\\_")
+        .replace("*", "%")
+        .replace("?", "_")
+        for part in GLOB_SET.split(pattern)
+    ]
+
+    return "_".join(parts).upper()
+
+
+def get_schema_catalog(
+    con: Engine, schema: str, include: list[str], exclude: list[str] | None = None
+) -> dict[str, list[tuple[str, str]]]:
+    """Tabelas do schema filtradas por padroes glob e suas colunas em uma consulta.
+
+    Os padroes (sem diferenciar maiusculas) viram `like` no HANA, o `fnmatch`
+    so confirma o resultado. Retorna `{tabela: [(coluna, DATA_TYPE_NAME), ...]}`
+    com os nomes originais do catalogo, na ordem das colunas.
+    """
+    exclude = exclude or list()
+    params = {"schema": schema.upper()}
+
+    includes = list()
+    for index, pattern in enumerate(include):
+        params[f"include_{index}"] = like_pattern(pattern)
+        includes.append(f"upper(t.table_name) like :include_{index} escape '\\'")
+
+    # NOTE: `[...]` nao tem equivalente exato no like, fica so no fnmatch
+    excludes = list()
+    for index, pattern in enumerate(exclude):
+        if GLOB_SET.search(pattern) is None:
+            params[f"exclude_{index}"] = like_pattern(pattern)
+            excludes.append(
+                f"upper(t.table_name) not like :exclude_{index} escape '\\'"
+            )
+
+    where = " and ".join([f"({' or '.join(includes)})", *excludes])
+
+    stmt = text(
+        f"""
+        select c.table_name, c.column_name, c.data_type_name
+        from sys.tables t
+        inner join sys.table_columns c
+            on c.schema_name = t.schema_name and c.table_name = t.table_name
+        where t.schema_name = :schema and t.is_temporary = 'FALSE'
+            and {where}
+        order by c.table_name, c.position
+        """
+    )
+
+    try:
+        with con.connect() as conn:
+            response = conn.execute(stmt, params).all()
+    except Exception as e:
+        raise ValueError(escape(str(e)))
+
+    catalog = dict()
+
+    def matches(table_name: str, patterns: list[str]) -> bool:
+        return any(
+            fnmatchcase(table_name.lower(), pattern.lower()) for pattern in patterns
+        )
+
+    for table_name, column_name, data_type in response:
+        if not matches(table_name, include) or matches(table_name, exclude):
+            continue
+
+        catalog.setdefault(table_name, list()).append((column_name, data_type))
+
+    return catalog
+
+
+def build_stmt(columns: list[tuple[str, str]], table_name: str, schema: str) -> str:
+    """Select com nomes do catalogo entre aspas (`/BIC/...`) e alias para o Athena.
+
+    O alias maiusculo sem aspas volta minusculo (`normalize_name`) do cursor.
+    """
+    select = [
+        f"{quote(name)} as {quote(athena_name(name).upper())}" for name, __ in columns
+    ]
+
+    source = f"{quote(schema.upper())}.{quote(table_name)}"
+
+    return f"""select {",".join(select)} from {source}"""
+
+
+def build_schema(
+    columns: list[tuple[str, str]], table_name: str | None = None
+) -> pa.Schema:
+    fields = [(name, MAP_TYPE_NAMES.get(data_type)) for name, data_type in columns]
+
+    if invalid := [
+        f"{name} ({data_type})"
+        for (name, data_type), (__, type_) in zip(columns, fields)
+        if type_ is None
+    ]:
+        raise ValueError(
+            escape(f"Tipo nao suportado em {table_name}: {', '.join(invalid)}")
+        )
+
+    return pa.schema(fields)
+
+
+def get_query_columns(con: Engine, query: str) -> pa.Schema:
+    """Schema Arrow pelo metadata do result set da consulta, sem ler linhas."""
+    try:
+        with con.connect() as conn:
+            cursor = conn.connection.cursor()
+            try:
+                cursor.execute(f"select * from ({query}) as t where 1 = 0")
+                description = cursor.description
+            finally:
+                cursor.close()
+    except Exception as e:
+        raise ValueError(escape(str(e)))
+
+    columns = [
+        (normalize_name(name), MAP_TYPE_CODES.get(type_code))
+        for name, type_code, *__ in description
+    ]
+
+    if invalid := [name for name, data_type in columns if data_type is None]:
+        raise ValueError(escape(f"Tipo nao suportado na consulta: {invalid}"))
+
+    return build_schema(columns)
+
+
+def read_lob(
+    lob,
+    name: str,
+    binary: bool,
+    limit: int,
+    policy: LOB_POLICY,
+    cut: dict[str, int] | None = None,
+):
+    """Le o LOB pelo locator em pedacos de LOB_CHUNK, ate `limit`.
+
+    Valores acima do limite (truncados ou nulos) sao contados por coluna em `cut`.
+    """
+    if lob is None or not hasattr(lob, "read"):
+        return lob
+
+    parts, size = list(), 0
+
+    try:
+        while size < limit:
+            part = lob.read(min(LOB_CHUNK, limit - size))
+            if not part:
+                break
+
+            parts.append(part)
+            size += len(part)
+        else:
+            if lob.read(1):
+                if policy == "error":
+                    raise ValueError(escape(f"LOB maior que o limite: {name}"))
+                if cut is not None:
+                    cut[name] = cut.get(name, 0) + 1
+                if policy == "null":
+                    return None
+    finally:
+        lob.close()
+
+    return (b"" if binary else "").join(parts)
+
+
+def to_frame(rows: list[list], names: list[str], dtype_arrow: pa.Schema):
+    # NOTE: cursor DBAPI entrega DECIMAL como `Decimal`, o Arrow nao converte
+    floats = {f.name: "float64" for f in dtype_arrow if pa.types.is_floating(f.type)}
+
+    return pd.DataFrame(rows, columns=names).astype(floats)
+
+
+def read_lob_lotes(
+    con,
+    stmt: str,
+    dtype_arrow: pa.Schema,
+    options: dict,
+    cut: dict[str, int] | None = None,
+):
+    """Lotes via cursor DBAPI, colunas LOB lidas em streaming pelo locator.
+
+    O lote fecha em LOB_ROWS linhas ou quando os LOBs lidos somam `lob_batch_mb`.
+    """
+    limit = int(float(options.get("lob_max_mb", 16)) * 1024**2)
+    budget = int(float(options.get("lob_batch_mb", 64)) * 1024**2)
+    policy = options.get("lob_policy", "truncate")
+
+    lobs = {
+        field.name: pa.types.is_large_binary(field.type)
+        for field in dtype_arrow
+        if is_lob(field.type)
+    }
+
+    cursor = con.connection.cursor()
+    try:
+        cursor.execute(stmt)
+
+        names = [normalize_name(column[0]) for column in cursor.description]
+        positions = [
+            (index, name, lobs[name])
+            for index, name in enumerate(names)
+            if name in lobs
+        ]
+
+        lote, size = list(), 0
+        while rows := cursor.fetchmany(LOB_ROWS):
+            for row in rows:
+                row = list(row)
+
+                for index, name, binary in positions:
+                    row[index] = read_lob(
+                        row[index], name, binary, limit, policy, cut
+                    )
+                    size += len(row[index] or "")
+
+                lote.append(row)
+
+                if size >= budget or len(lote) >= LOB_ROWS:
+                    yield to_frame(lote, names, dtype_arrow)
+                    lote, size = list(), 0
+
+        if lote:
+            yield to_frame(lote, names, dtype_arrow)
+    finally:
+        cursor.close()
+
+
+def read_lotes(
+    con, stmt: str, dtype_arrow: pa.Schema, cut: dict[str, int] | None = None
+):
+    if any(is_lob(field.type) for field in dtype_arrow):
+        return read_lob_lotes(con, stmt, dtype_arrow, load_options(), cut)
+
+    return pd.read_sql(stmt, con=con, chunksize=CHUNK)
+
+
+def get_table_stats(
+    con: Engine, tables: list[tuple[str, str]]
+) -> dict[tuple[str, str], tuple[int, int]]:
+    """Linhas e memoria (bytes) estimadas de todas as tabelas em uma unica consulta."""
+    if not tables:
+        return dict()
+
+    stmt = text(
+        """
+        select schema_name, table_name, record_count, table_size
+        from sys.m_tables
+        where schema_name || '.' || table_name in :names
+        """
+    ).bindparams(bindparam("names", expanding=True))
+
+    names = [f"{schema.upper()}.{table_name.upper()}" for schema, table_name in tables]
+
+    try:
+        with con.connect() as conn:
+            response = conn.execute(stmt, {"names": names}).all()
+    except Exception as e:
+        raise ValueError(escape(str(e)))
+
+    return {
+        (schema.lower(), table_name.lower()): (int(rows or 0), int(size or 0))
+        for schema, table_name, rows, size in response
+    }
+
+
+def is_temporal(type_: pa.DataType) -> bool:
+    return pa.types.is_date(type_) or pa.types.is_timestamp(type_)
+
+
+def check_partitions(
+    partitions: list[str], dtype_arrow: pa.Schema | None = None
+) -> list[str]:
+    """Valida a sintaxe e, com `dtype_arrow`, a coluna e o tipo de cada particao.
+
+    Em `replace` a tabela do Athena e apagada antes do `CREATE TABLE`, entao o
+    erro precisa aparecer antes da extracao.
+    """
+    if invalid := [spec for spec in partitions if not PARTITION_SPEC.match(spec)]:
+        raise ValueError(escape(f"Particao invalida: {invalid}"))
+
+    if dtype_arrow is None:
+        return partitions
+
+    types_ = {f.name.lower(): f.type for f in dtype_arrow}
+    invalid = list()
+
+    for spec in partitions:
+        match = PARTITION_SPEC.match(spec)
+        column = (
+            match["column"] or match["temporal_column"] or match["transform_column"]
+        )
+        type_ = types_.get(column.lower())
+
+        if type_ is None:
+            invalid.append(f"{spec} (coluna nao existe)")
+        elif match["temporal"] and not is_temporal(type_):
+            invalid.append(f"{spec} (exige DATE/TIMESTAMP, coluna {type_})")
+        elif (match["transform"] or "").lower() == "truncate" and not (
+            pa.types.is_integer(type_) or pa.types.is_string(type_)
+        ):
+            invalid.append(f"{spec} (exige inteiro ou texto, coluna {type_})")
+
+    if invalid:
+        raise ValueError(escape(f"Particao invalida: {', '.join(invalid)}"))
+
+    return partitions
+
+
 def export_athena(
     file: str,
     table_name: str,
     schema: str,
     operation: Literal["replace", "append", "merge"] = "replace",
+    partitions: list[str] | None = None,
 ) -> None:
     try:
         if operation == "merge":
@@ -111,12 +526,76 @@ def export_athena(
                 table_name=table_name,
                 schema=schema,
                 location=f"{location}{table_name}/",
+                partitions=partitions or None,
                 if_exists=operation,
             )
     except Exception as e:
         raise ValueError(escape(str(e)))
 
 
+def maintain_table(table_name: str, schema: str, options: dict) -> list[str]:
+    """OPTIMIZE quando ha arquivos demais/pequenos e VACUUM dos snapshots antigos.
+
+    `options` e a secao `maintenance` da tabela; retorna os comandos executados.
+    """
+    try:
+        config = load_config().get("athena")
+        config.pop("s3_dir")
+
+        small = int(float(options.get("small_file_mb", 32)) * 1024**2)
+        executed = list()
+
+        with Athena(cursor=CursorPython(**config)) as client:
+            files, small_files = client.execute(
+                f"""
+                select count(*), count_if(file_size_in_bytes < {small})
+                from "{schema}"."{table_name}$files"
+                """
+            ).fetchone()
+            files, small_files = int(files or 0), int(small_files or 0)
+
+            ratio = small_files / files if files else 0.0
+            if files >= int(options.get("min_files", 100)) or (
+                small_files > 1 and ratio >= float(options.get("small_file_ratio", 0.5))
+            ):
+                client.execute(
+                    f"OPTIMIZE {schema}.{table_name} REWRITE DATA USING BIN_PACK"
+                )
+                executed.append("OPTIMIZE")
+
+            if options.get("vacuum", True):
+                if hours := options.get("snapshot_age_hours"):
+                    client.execute(
+                        f"""
+                        ALTER TABLE `{schema}`.`{table_name}` SET TBLPROPERTIES (
+                            'vacuum_max_snapshot_age_seconds'='{int(hours * 3600)}'
+                        )
+                        """
+                    )
+                client.execute(f"VACUUM {schema}.{table_name}")
+                executed.append("VACUUM")
+
+        return executed
+    except Exception as e:
+        raise ValueError(escape(str(e)))
+
+
+def get_athena_metrics(
+    table_name: str,
+    schema: str,
+    dtype_arrow: pa.Schema,
+    operation: Literal["replace", "append"],
+) -> Metrics:
+    try:
+        config = load_config().get("athena")
+        config.pop("s3_dir")
+
+        with Athena(cursor=CursorPython(**config)) as client:
+            return from_athena(client, schema, table_name, dtype_arrow, operation)
+    except Exception as e:
+        raise ValueError(escape(str(e)))
+
+
 async def async_do_connect():
     loop = asyncio.get_event_loop()
     return await loop.run_in_executor(None, do_connect)
@@ -132,56 +611,335 @@ async def async_get_columns(con: Engine, table_name: str, schema: str) -> pa.Sch
     return await loop.run_in_executor(None, get_columns, con, table_name, schema)
 
 
-async def async_pandas_lotes(table_name: str, schema: str):
+async def async_get_table_stats(
+    con: Engine, tables: list[tuple[str, str]]
+) -> dict[tuple[str, str], tuple[int, int]]:
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, get_table_stats, con, tables)
+
+
+async def async_get_schema_catalog(
+    con: Engine, schema: str, include: list[str], exclude: list[str] | None = None
+) -> dict[str, list[tuple[str, str]]]:
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        None, get_schema_catalog, con, schema, include, exclude
+    )
+
+
+async def async_get_query_columns(con: Engine, query: str) -> pa.Schema:
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, get_query_columns, con, query)
+
+
+async def async_pandas_lotes(
+    table_name: str,
+    schema: str,
+    dtype_arrow: pa.Schema | None = None,
+    stmt: str | None = None,
+    cut: dict[str, int] | None = None,
+):
     engine = await async_do_connect()
-    dtype_arrow = await async_get_columns(engine, table_name, schema)
-    stmt = await async_create_stmt(engine, table_name, schema)
+    if dtype_arrow is None:
+        dtype_arrow = await async_get_columns(engine, table_name, schema)
+    if stmt is None:
+        stmt = await async_create_stmt(engine, table_name, schema)
 
     yield dtype_arrow
 
+    # NOTE: fetch fora do event loop, permite varias tabelas em paralelo
+    loop = asyncio.get_running_loop()
     with engine.begin() as con:
-        for chunk in pd.read_sql(stmt, con=con, chunksize=CHUNK):
+        lotes = await loop.run_in_executor(
+            None, read_lotes, con, stmt, dtype_arrow, cut
+        )
+        while True:
+            chunk = await loop.run_in_executor(None, next, lotes, None)
+            if chunk is None:
+                break
             yield chunk
 
 
+def get_process_pool() -> ProcessPoolExecutor:
+    global POOL, MANAGER
+
+    if POOL is None:
+        # NOTE: spawn evita fork de um processo com as threads do textual
+        context = multiprocessing.get_context("spawn")
+        POOL = ProcessPoolExecutor(
+            max_workers=load_options().get("workers"), mp_context=context
+        )
+        if MANAGER is None:
+            MANAGER = context.Manager()
+
+    return POOL
+
+
+def reset_process_pool(pool: ProcessPoolExecutor) -> None:
+    global POOL
+
+    # NOTE: pool quebrado nao aceita novos jobs, o proximo export cria outro
+    if POOL is pool:
+        POOL = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_process_pool() -> None:
+    global POOL, MANAGER
+
+    if POOL is not None:
+        POOL.shutdown(cancel_futures=True)
+        MANAGER.shutdown()
+        POOL = MANAGER = None
+
+
+def poll(queue):
+    try:
+        return queue.get(timeout=POLL)
+    except Empty:
+        return Empty
+
+
+def extract_parquet(
+    table_name: str,
+    schema: str,
+    file: str,
+    progress=None,
+    dtype_arrow: pa.Schema | None = None,
+    stmt: str | None = None,
+    reconcile: bool = False,
+) -> Metrics:
+    """Leitura SAP, conversao Arrow e gravacao Parquet dentro do processo worker.
+
+    Os lotes nunca saem do processo, apenas o total de linhas e bytes
+    gravados e enviado para `progress` a cada chunk.
+    """
+    try:
+        engine = do_connect()
+        if dtype_arrow is None:
+            dtype_arrow = get_columns(engine, table_name, schema)
+        if stmt is None:
+            stmt = create_stmt(engine, table_name, schema)
+
+        metrics, nbytes = Metrics(), 0
+        with (
+            pq.ParquetWriter(file, schema=dtype_arrow, compression="zstd") as writer,
+            engine.begin() as con,
+        ):
+            for df in read_lotes(con, stmt, dtype_arrow, metrics.lobs):
+                tbl = pa.Table.from_pandas(df, preserve_index=False, schema=dtype_arrow)
+                writer.write_table(tbl, CHUNK)
+                nbytes += tbl.nbytes
+
+                if reconcile:
+                    metrics.update(tbl)
+                else:
+                    metrics.rows += tbl.num_rows
+
+                if progress is not None:
+                    progress.put((metrics.rows, nbytes))
+
+        return metrics
+    finally:
+        if progress is not None:
+            progress.put(None)
+
+
+async def async_extract_thread(
+    table_name: str,
+    schema: str,
+    file: str,
+    status: Status,
+    progress: Progress | None = None,
+    dtype_arrow: pa.Schema | None = None,
+    stmt: str | None = None,
+    reconcile: bool = False,
+) -> Metrics:
+    metrics = Metrics()
+    gen_dataframe = async_pandas_lotes(
+        table_name, schema, dtype_arrow, stmt, metrics.lobs
+    )
+    dtype_arrow = await gen_dataframe.__anext__()
+
+    status.update("SAP: Tipos Arrow definido ...")
+
+    to_pandas = partial(pa.Table.from_pandas, preserve_index=False, schema=dtype_arrow)
+    loop = asyncio.get_running_loop()
+
+    with pq.ParquetWriter(file, schema=dtype_arrow, compression="zstd") as writer:
+        async for df in gen_dataframe:
+            rows, __ = df.shape
+
+            tbl = await loop.run_in_executor(None, to_pandas, df)
+            await loop.run_in_executor(None, writer.write_table, tbl, CHUNK)
+
+            if reconcile:
+                await loop.run_in_executor(None, metrics.update, tbl)
+            else:
+                metrics.rows += tbl.num_rows
+            status.update(f"SAP: {table_name}, {metrics.rows}")
+
+            if progress is not None:
+                progress(rows, tbl.nbytes)
+
+    return metrics
+
+
+async def async_extract_process(
+    table_name: str,
+    schema: str,
+    file: str,
+    status: Status,
+    progress: Progress | None = None,
+    dtype_arrow: pa.Schema | None = None,
+    stmt: str | None = None,
+    reconcile: bool = False,
+) -> Metrics:
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    queue = MANAGER.Queue()
+
+    status.update(f"SAP: {table_name}, processo worker ...")
+
+    future = loop.run_in_executor(
+        pool,
+        extract_parquet,
+        table_name,
+        schema,
+        file,
+        queue,
+        dtype_arrow,
+        stmt,
+        reconcile,
+    )
+
+    last = (0, 0)
+    try:
+        while (total := await loop.run_in_executor(None, poll, queue)) is not None:
+            # NOTE: fila vazia, o worker pode ter morrido sem enviar o `None`
+            if total is Empty:
+                if future.done():
+                    break
+                continue
+
+            status.update(f"SAP: {table_name}, {total[0]}")
+
+            if progress is not None:
+                progress(total[0] - last[0], total[1] - last[1])
+            last = total
+
+        return await future
+    except BrokenProcessPool:
+        reset_process_pool(pool)
+        raise ValueError(escape(f"Processo worker encerrado: {table_name}"))
+    finally:
+        future.cancel()
+
+
 async def async_export_athena(*args):
     loop = asyncio.get_event_loop()
     return await loop.run_in_executor(None, export_athena, *args)
 
 
+async def async_maintain_table(
+    table_name: str, schema: str, options: dict
+) -> list[str]:
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        None, maintain_table, table_name, schema, options
+    )
+
+
+async def async_get_athena_metrics(*args) -> Metrics:
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, get_athena_metrics, *args)
+
+
+async def async_from_hana(con: Engine, source: str, dtype_arrow: pa.Schema) -> Metrics:
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, from_hana, con, source, dtype_arrow)
+
+
 async def write_parquet(
     table_name: str,
     schema: str,
-    status: Label,
+    status: Status,
     aws_schema: str,
     aws_table_name: str,
     aws_operation: Literal["replace", "append", "merge"],
-) -> None:
-    gen_dataframe = async_pandas_lotes(table_name, schema)
-    dtype_arrow = await gen_dataframe.__anext__()
-
-    status.update("SAP: Tipos Arrow definido ...")
+    executor: EXECUTOR | None = None,
+    progress: Progress | None = None,
+    dtype_arrow: pa.Schema | None = None,
+    stmt: str | None = None,
+) -> ExportResult:
+    """Exporta a tabela; retorna linhas, bytes, duracao das etapas e divergencias."""
+    if executor is None:
+        executor = load_options().get("executor", "thread")
+
+    reconcile = load_options().get("reconcile", False)
+    options = load_table_options(aws_schema, aws_table_name)
+    partitions = check_partitions(options.get("partitions", list()))
+    result = ExportResult()
+
+    start = monotonic()
+    if reconcile or partitions:
+        engine = await async_do_connect()
+        if dtype_arrow is None:
+            dtype_arrow = await async_get_columns(engine, table_name, schema)
+        if stmt is None:
+            stmt = await async_create_stmt(engine, table_name, schema)
+
+    # NOTE: colunas e tipos conferidos antes da extracao e do drop no Athena
+    check_partitions(partitions, dtype_arrow)
 
     with tempfile.NamedTemporaryFile(
         prefix="export_", suffix=".parquet", delete=False
     ) as f:
-        to_pandas = partial(
-            pa.Table.from_pandas, preserve_index=False, schema=dtype_arrow
-        )
-        loop = asyncio.get_running_loop()
+        f.close()
 
-        with pq.ParquetWriter(f, schema=dtype_arrow, compression="zstd") as writer:
-            total = 0
-            async for df in gen_dataframe:
-                rows, __ = df.shape
-                total += rows
+        if executor == "process":
+            extract = async_extract_process
+        else:
+            extract = async_extract_thread
 
-                tbl = await loop.run_in_executor(None, to_pandas, df)
-                await loop.run_in_executor(None, writer.write_table, tbl, CHUNK)
-                status.update(f"SAP: {table_name}, {total}")
+        metrics = await extract(
+            table_name, schema, f.name, status, progress, dtype_arrow, stmt, reconcile
+        )
 
-        f.close()
+        result.rows, result.bytes = metrics.rows, os.path.getsize(f.name)
+        result.lobs = metrics.lobs
+        result.stages["extract"] = monotonic() - start
 
+        start = monotonic()
         status.update(f"ATHENA: {aws_table_name} - {aws_operation}")
-        await async_export_athena(f.name, aws_table_name, aws_schema, aws_operation)
-        status.update(f"ATHENA: {aws_table_name} - {total} - {aws_operation}")
+        await async_export_athena(
+            f.name, aws_table_name, aws_schema, aws_operation, partitions
+        )
+        status.update(f"ATHENA: {aws_table_name} - {metrics.rows} - {aws_operation}")
+        result.stages["upload"] = monotonic() - start
+
+        if reconcile:
+            start = monotonic()
+            status.update(f"SAP: {table_name} - reconciliacao ...")
+
+            report = compare(
+                metrics,
+                await async_from_hana(engine, f"({stmt})", dtype_arrow),
+                "HANA",
+            )
+            # NOTE: merge nao grava no Athena, sem metadata para conferir
+            if aws_operation != "merge":
+                report += compare(
+                    metrics,
+                    await async_get_athena_metrics(
+                        aws_table_name, aws_schema, dtype_arrow, aws_operation
+                    ),
+                    "ATHENA",
+                )
+
+            result.mismatches = [
+                f"{aws_schema}.{aws_table_name}: {msg}" for msg in report
+            ]
+            result.stages["reconcile"] = monotonic() - start
+
+        return result
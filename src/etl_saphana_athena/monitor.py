@@ -0,0 +1,92 @@
+from collections import deque
+from dataclasses import dataclass, field
+from time import monotonic
+
+
+# NOTE: amostras de vazao guardadas por tabela (sparkline)
+SAMPLES = 40
+
+BARS = " ▁▂▃▄▅▆▇█"
+
+# NOTE: vazao medida numa janela deslizante (segundos); o progresso chega em
+# chunks de milhares de linhas, por tick a taxa alterna entre 0 e picos
+WINDOW = 3.0
+
+
+@dataclass
+class TableProgress:
+    name: str
+    stage: str = "fila"
+    rows: int = 0
+    bytes: int = 0
+    started: float = field(default_factory=monotonic)
+    rows_per_s: float = 0.0
+    bytes_per_s: float = 0.0
+    history: deque = field(default_factory=lambda: deque(maxlen=SAMPLES))
+    window: deque = field(default_factory=deque)
+
+    def sample(self, now: float) -> None:
+        self.window.append((now, self.rows, self.bytes))
+
+        # NOTE: mantem a amostra mais recente anterior ao inicio da janela
+        while len(self.window) > 2 and self.window[1][0] <= now - WINDOW:
+            self.window.popleft()
+
+        moment, rows, bytes_ = self.window[0]
+        if elapsed := now - moment:
+            self.rows_per_s = (self.rows - rows) / elapsed
+            self.bytes_per_s = (self.bytes - bytes_) / elapsed
+            self.history.append(self.rows_per_s)
+
+    def sparkline(self) -> str:
+        top = max(self.history, default=0) or 1
+        return "".join(
+            BARS[round(value / top * (len(BARS) - 1))] for value in self.history
+        )
+
+
+class TableStatus:
+    """`Status` de uma tabela: guarda o texto como etapa, sem redesenhar a tela."""
+
+    def __init__(self, table: TableProgress) -> None:
+        self.table = table
+
+    def update(self, content: str) -> None:
+        self.table.stage = content
+
+
+class Monitor:
+    """Agrega eventos de progresso das tabelas; a interface le em taxa fixa.
+
+    Cada job tem sua chave (`id(job)`): dois jobs podem ter o mesmo destino.
+    """
+
+    def __init__(self) -> None:
+        self.tables: dict[int, TableProgress] = dict()
+        self.rows = 0
+        self.bytes = 0
+
+    def start(self, key: int, name: str) -> TableStatus:
+        self.tables[key] = TableProgress(name)
+        return TableStatus(self.tables[key])
+
+    def finish(self, key: int) -> None:
+        self.tables.pop(key, None)
+
+    def progress(self, key: int):
+        table = self.tables[key]
+
+        def advance(rows: int, nbytes: int) -> None:
+            table.rows += rows
+            table.bytes += nbytes
+            self.rows += rows
+            self.bytes += nbytes
+
+        return advance
+
+    def sample(self) -> list[TableProgress]:
+        now = monotonic()
+        for table in self.tables.values():
+            table.sample(now)
+
+        return list(self.tables.values())
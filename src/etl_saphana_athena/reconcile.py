@@ -0,0 +1,179 @@
+from dataclasses import dataclass, field
+from sqlalchemy import text
+from sqlalchemy.engine.base import Engine
+from rich.markup import escape
+from athena_mvsh import Athena
+from typing import Literal
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+def is_numeric(type_: pa.DataType) -> bool:
+    return pa.types.is_integer(type_) or pa.types.is_floating(type_)
+
+
+def is_lob(type_: pa.DataType) -> bool:
+    return pa.types.is_large_string(type_) or pa.types.is_large_binary(type_)
+
+
+@dataclass
+class Metrics:
+    """Metricas de reconciliacao: linhas, nulos por coluna, min/max/soma numericos."""
+
+    rows: int = 0
+    nulls: dict[str, int] = field(default_factory=dict)
+    mins: dict[str, float] = field(default_factory=dict)
+    maxs: dict[str, float] = field(default_factory=dict)
+    sums: dict[str, float] = field(default_factory=dict)
+    # NOTE: soma dos modulos das colunas float, escala da tolerancia das somas
+    abs_sums: dict[str, float] = field(default_factory=dict)
+    # NOTE: valores LOB truncados/nulos pela `lob_policy`, por coluna
+    lobs: dict[str, int] = field(default_factory=dict)
+
+    def update(self, tbl: pa.Table) -> None:
+        self.rows += tbl.num_rows
+
+        for name, column in zip(tbl.column_names, tbl.columns):
+            self.nulls[name] = self.nulls.get(name, 0) + column.null_count
+
+            if not is_numeric(column.type) or column.null_count == len(column):
+                continue
+
+            min_max = pc.min_max(column)
+            total = pc.sum(column).as_py()
+
+            self.merge(name, min_max["min"].as_py(), min_max["max"].as_py(), total)
+
+            if pa.types.is_floating(column.type):
+                abs_total = pc.sum(pc.abs(column).cast(pa.float64())).as_py()
+                self.abs_sums[name] = self.abs_sums.get(name, 0.0) + abs_total
+
+    def merge(self, name: str, min_, max_, total=None) -> None:
+        if min_ is not None:
+            self.mins[name] = min(self.mins.get(name, min_), min_)
+        if max_ is not None:
+            self.maxs[name] = max(self.maxs.get(name, max_), max_)
+        if total is not None:
+            self.sums[name] = self.sums.get(name, 0) + total
+
+
+def from_athena(
+    client: Athena,
+    schema: str,
+    table_name: str,
+    dtype_arrow: pa.Schema,
+    operation: Literal["replace", "append"],
+) -> Metrics:
+    """Metricas do metadata Iceberg apos o upload (`$snapshots` e `$files`).
+
+    Linhas vem do ultimo snapshot (`added-records`). Nulos e min/max das
+    colunas inteiras vem dos arquivos apenas em `replace`, quando a tabela
+    contem so esta carga.
+    """
+    (added,) = client.execute(
+        f"""
+        select summary['added-records']
+        from "{schema}"."{table_name}$snapshots"
+        order by committed_at desc
+        limit 1
+        """
+    ).fetchone()
+    metrics = Metrics(rows=int(added or 0))
+
+    if operation != "replace":
+        return metrics
+
+    # NOTE: tabela criada pelo `replace`, field id = posicao da coluna + 1
+    ids = {f.name: index for index, f in enumerate(dtype_arrow, start=1)}
+    integer = [f.name for f in dtype_arrow if pa.types.is_integer(f.type)]
+
+    columns = [f"sum(element_at(null_value_counts, {ids[name]}))" for name in ids]
+    for name in integer:
+        columns += [
+            f"min(try_cast(element_at(lower_bounds, {ids[name]}) as bigint))",
+            f"max(try_cast(element_at(upper_bounds, {ids[name]}) as bigint))",
+        ]
+
+    row = client.execute(
+        f"""select {','.join(columns)} from "{schema}"."{table_name}$files" """
+    ).fetchone()
+
+    nulls, bounds = row[: len(ids)], row[len(ids) :]
+    for name, count_ in zip(ids, nulls):
+        # NOTE: sem metricas para a coluna (metrics mode `none`)
+        if count_ is not None:
+            metrics.nulls[name] = int(count_)
+
+    for index, name in enumerate(integer):
+        min_, max_ = bounds[index * 2 : index * 2 + 2]
+        metrics.merge(name, min_, max_)
+
+    return metrics
+
+
+def from_hana(con: Engine, source: str, dtype_arrow: pa.Schema) -> Metrics:
+    """Uma consulta de agregacao no HANA sobre `source` (tabela ou subconsulta)."""
+    numeric = [f.name for f in dtype_arrow if is_numeric(f.type)]
+    # NOTE: HANA nao agrega colunas LOB
+    names = [f.name for f in dtype_arrow if not is_lob(f.type)]
+
+    columns = ["count(*)"]
+    columns += [f"count({name})" for name in names]
+    for name in numeric:
+        columns += [f"min({name})", f"max({name})", f"sum({name})"]
+
+    try:
+        with con.connect() as conn:
+            row = conn.execute(
+                text(f"select {','.join(columns)} from {source} as t")
+            ).one()
+    except Exception as e:
+        raise ValueError(escape(str(e)))
+
+    rows, *values = row
+    metrics = Metrics(rows=rows)
+
+    counts, values = values[: len(names)], values[len(names) :]
+    for name, count_ in zip(names, counts):
+        metrics.nulls[name] = rows - count_
+
+    for index, name in enumerate(numeric):
+        min_, max_, total = values[index * 3 : index * 3 + 3]
+        # NOTE: inteiros continuam int (comparacao exata), DECIMAL/float viram float
+        cast = int if pa.types.is_integer(dtype_arrow.field(name).type) else float
+        if min_ is not None:
+            metrics.merge(name, cast(min_), cast(max_), cast(total))
+
+    return metrics
+
+
+def same(a, b, scale: float = 0.0) -> bool:
+    """Inteiros exatos; floats (DECIMAL vira float32) com tolerancia relativa.
+
+    `scale` (soma dos modulos) evita falso alarme em somas que se anulam,
+    como debitos e creditos: o erro do float32 cresce com ela, nao com a soma.
+    """
+    if isinstance(a, float) and isinstance(b, float):
+        return abs(a - b) <= 1e-3 * max(abs(a), abs(b), scale) + 1e-6
+
+    return a == b
+
+
+def compare(stream: Metrics, other: Metrics, origin: str) -> list[str]:
+    """Divergencias entre as metricas do stream e as de `origin` (HANA/ATHENA)."""
+    mismatches = list()
+
+    if stream.rows != other.rows:
+        mismatches.append(f"{origin}: linhas {other.rows} != {stream.rows}")
+
+    for attr in ("nulls", "mins", "maxs", "sums"):
+        expected, found = getattr(stream, attr), getattr(other, attr)
+
+        for name in expected.keys() & found.keys():
+            scale = stream.abs_sums.get(name, 0.0) if attr == "sums" else 0.0
+            if not same(expected[name], found[name], scale):
+                mismatches.append(
+                    f"{origin}: {attr}({name}) {found[name]} != {expected[name]}"
+                )
+
+    return mismatches
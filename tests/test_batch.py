@@ -0,0 +1,79 @@
+from etl_saphana_athena.batch import (
+    ExportJob,
+    aws_name,
+    batch_eta,
+    is_pattern,
+    next_job,
+    parse_patterns,
+    schedule,
+)
+from collections import deque
+
+
+def job(table_name, rows=0, size=0, schema="sap", aws_table_name=None):
+    return ExportJob(
+        schema, table_name, "aws", aws_table_name or table_name, "replace", rows, size
+    )
+
+
+def test_schedule_largest_first():
+    jobs = [job("a", 10, 100), job("b", 99, 5), job("c", 1, 500), job("d", 7, 100)]
+
+    assert [j.table_name for j in schedule(jobs)] == ["c", "a", "d", "b"]
+
+
+def test_schedule_queries_first():
+    jobs = [job("a", 10, 100), job("q", schema="query"), job("r", 50, schema="query")]
+
+    assert [j.table_name for j in schedule(jobs)] == ["r", "q", "a"]
+
+
+def test_next_job_skips_busy_target():
+    queue = deque([job("a", aws_table_name="x"), job("b", aws_table_name="y")])
+
+    found = next_job(queue, {("aws", "x")})
+
+    assert found.table_name == "b"
+    assert [j.table_name for j in queue] == ["a"]
+
+
+def test_next_job_all_busy():
+    queue = deque([job("a", aws_table_name="x"), job("b", aws_table_name="x")])
+
+    assert next_job(queue, {("aws", "x")}) is None
+    assert len(queue) == 2
+
+
+def test_batch_eta_slots():
+    assert batch_eta([], 2) == 0.0
+    assert batch_eta([10, 8, 3, 2], 1) == 23
+    # NOTE: slots [10 + 2, 8 + 3]
+    assert batch_eta([10, 8, 3, 2], 2) == 12
+
+
+def test_batch_eta_current_loads():
+    assert batch_eta([5], 2, [20.0, 1.0]) == 20.0
+    assert batch_eta([30], 2, [20.0, 1.0]) == 31.0
+
+
+def test_parse_patterns():
+    assert parse_patterns("vbak*, vbap* ,!*_old") == (["vbak*", "vbap*"], ["*_old"])
+
+
+def test_parse_patterns_only_excludes():
+    assert parse_patterns("!*_old, !tmp?") == (["*"], ["*_old", "tmp?"])
+
+
+def test_parse_patterns_ignores_empty():
+    assert parse_patterns("vbak,, ") == (["vbak"], [])
+
+
+def test_is_pattern():
+    assert not is_pattern("vbak")
+    assert all(map(is_pattern, ["vb*", "vba?", "vb[ak]", "!x", "a,b"]))
+
+
+def test_aws_name():
+    assert aws_name("sap_*", "vbak") == "sap_vbak"
+    assert aws_name("*_raw", "vbak") == "vbak_raw"
+    assert aws_name("sap_", "vbak") == "sap_vbak"
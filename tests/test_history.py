@@ -0,0 +1,77 @@
+from etl_saphana_athena import history
+from etl_saphana_athena.history import Baseline, baselines, record, regression
+from datetime import datetime
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def database(tmp_path, monkeypatch):
+    monkeypatch.setattr(history, "FILE", tmp_path / "export.db")
+    monkeypatch.setattr(history, "load_options", lambda: dict())
+
+
+def run(rows, extract, upload, outcome="ok", table="vbak"):
+    record(
+        "sap",
+        table,
+        "aws",
+        f"sap_{table}",
+        datetime(2026, 1, 1),
+        rows,
+        rows * 10,
+        {"extract": extract, "upload": upload},
+        outcome=outcome,
+    )
+
+
+def test_baselines_without_database():
+    assert baselines([("sap", "vbak")]) == dict()
+
+
+def test_baselines_median_of_successful_runs():
+    run(1000, 10, 5)
+    run(3000, 10, 1)
+    run(2000, 10, 3)
+    run(10, 100, 100, outcome="error")
+
+    baseline = baselines([("sap", "vbak"), ("sap", "mara")])
+
+    assert baseline == {
+        ("sap", "vbak"): Baseline(
+            rows_per_s=200.0, overhead_s=3.0, seconds=13.0, runs=3, rows=2000
+        )
+    }
+
+
+def test_baselines_last_runs_only(monkeypatch):
+    monkeypatch.setattr(history, "HISTORY", 2)
+    run(100, 100, 0)
+    run(1000, 10, 0)
+    run(1000, 10, 0)
+
+    assert baselines([("sap", "vbak")])[("sap", "vbak")].rows_per_s == 100.0
+
+
+def test_estimate():
+    baseline = Baseline(rows_per_s=100.0, overhead_s=5.0, seconds=60.0, runs=3)
+
+    assert baseline.estimate(1000) == 15.0
+    # NOTE: sem linhas estimadas, usa a duracao mediana
+    assert baseline.estimate(0) == 60.0
+
+
+def test_regression_min_seconds():
+    baseline = Baseline(rows_per_s=1000.0, overhead_s=0.0, seconds=0.0, runs=1)
+
+    assert regression(baseline, 10, history.MIN_SECONDS - 1) is None
+    assert regression(None, 10, 100) is None
+
+
+def test_regression_threshold(monkeypatch):
+    baseline = Baseline(rows_per_s=1000.0, overhead_s=0.0, seconds=0.0, runs=1)
+
+    assert regression(baseline, 5_000, 10) is None
+    assert "vazao 400" in regression(baseline, 4_000, 10)
+
+    monkeypatch.setattr(history, "load_options", lambda: {"regression_ratio": 0.3})
+    assert regression(baseline, 4_000, 10) is None
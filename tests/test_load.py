@@ -0,0 +1,204 @@
+from etl_saphana_athena import load
+from etl_saphana_athena.load import (
+    athena_name,
+    build_schema,
+    build_stmt,
+    check_partitions,
+    like_pattern,
+    read_lob,
+    read_lob_lotes,
+)
+from decimal import Decimal
+import pyarrow as pa
+import pytest
+import re
+
+
+@pytest.mark.parametrize(
+    "pattern, like",
+    [
+        ("vbak*", "VBAK%"),
+        ("vba?", "VBA_"),
+        ("*_old", "%\\_OLD"),
+        ("a%b", "A\\%B"),
+        ("a\\b", "A\\\\B"),
+        ("vb[ak]x", "VB_X"),
+        ("[!x]y*", "_Y%"),
+        ("[]a]b", "_B"),
+        ("/bic/*", "/BIC/%"),
+    ],
+)
+def test_like_pattern(pattern, like):
+    assert like_pattern(pattern) == like
+
+
+def test_athena_name():
+    assert athena_name("/BIC/ZMATNR") == "_bic_zmatnr"
+    assert athena_name("MANDT") == "mandt"
+
+
+def test_build_stmt_quotes_catalog_names():
+    columns = [("MANDT", "NVARCHAR"), ("/BIC/ZMATNR", "NVARCHAR")]
+
+    assert build_stmt(columns, "/BIC/AZSD0100", "sapabap1") == (
+        'select "MANDT" as "MANDT","/BIC/ZMATNR" as "_BIC_ZMATNR" '
+        'from "SAPABAP1"."/BIC/AZSD0100"'
+    )
+
+
+def test_build_schema():
+    schema = build_schema([("mandt", "NVARCHAR"), ("netwr", "DECIMAL")])
+
+    assert schema == pa.schema([("mandt", pa.string()), ("netwr", pa.float32())])
+
+
+def test_build_schema_unmapped_type():
+    with pytest.raises(ValueError, match="sap.zguid: guid \\(VARBINARY\\)"):
+        build_schema([("mandt", "NVARCHAR"), ("guid", "VARBINARY")], "sap.zguid")
+
+
+SCHEMA = pa.schema(
+    [
+        ("bukrs", pa.string()),
+        ("budat", pa.string()),
+        ("erdat", pa.date64()),
+        ("gjahr", pa.int16()),
+        ("netwr", pa.float32()),
+    ]
+)
+
+
+def test_check_partitions_valid():
+    partitions = ["bukrs", "month(erdat)", "bucket(16, budat)", "truncate(4, gjahr)"]
+
+    assert check_partitions(partitions, SCHEMA) == partitions
+
+
+@pytest.mark.parametrize(
+    "spec, error",
+    [
+        ("kunnr", "coluna nao existe"),
+        ("month(budat)", "exige DATE/TIMESTAMP"),
+        ("truncate(2, netwr)", "exige inteiro ou texto"),
+        ("month(budat, 2)", "Particao invalida"),
+    ],
+)
+def test_check_partitions_invalid(spec, error):
+    with pytest.raises(ValueError, match=re.escape(error)):
+        check_partitions([spec], SCHEMA)
+
+
+class FakeLob:
+    def __init__(self, value):
+        self.value = value
+        self.closed = False
+
+    def read(self, size):
+        part, self.value = self.value[:size], self.value[size:]
+        return part
+
+    def close(self):
+        self.closed = True
+
+
+def test_read_lob_within_limit():
+    lob = FakeLob("abc")
+
+    assert read_lob(lob, "txt", False, 10, "truncate") == "abc"
+    assert lob.closed
+
+
+def test_read_lob_exact_limit_is_not_cut():
+    cut = dict()
+
+    assert read_lob(FakeLob(b"abcd"), "raw", True, 4, "error", cut) == b"abcd"
+    assert cut == {}
+
+
+def test_read_lob_truncate():
+    cut = dict()
+
+    assert read_lob(FakeLob("abcdef"), "txt", False, 4, "truncate", cut) == "abcd"
+    assert read_lob(FakeLob("abcdef"), "txt", False, 4, "truncate", cut) == "abcd"
+    assert cut == {"txt": 2}
+
+
+def test_read_lob_null():
+    cut = dict()
+
+    assert read_lob(FakeLob("abcdef"), "txt", False, 4, "null", cut) is None
+    assert cut == {"txt": 1}
+
+
+def test_read_lob_error():
+    lob = FakeLob("abcdef")
+
+    with pytest.raises(ValueError, match="LOB maior que o limite: txt"):
+        read_lob(lob, "txt", False, 4, "error")
+    assert lob.closed
+
+
+def test_read_lob_plain_values():
+    assert read_lob(None, "txt", False, 4, "truncate") is None
+    assert read_lob("abc", "txt", False, 4, "truncate") == "abc"
+
+
+class FakeCursor:
+    description = [("NETWR",), ("TXT",)]
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute(self, stmt):
+        pass
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.connection = self
+        self.rows = rows
+
+    def cursor(self):
+        return FakeCursor(self.rows)
+
+
+LOB_SCHEMA = pa.schema([("netwr", pa.float32()), ("txt", pa.large_string())])
+
+
+def test_read_lob_lotes_flushes_on_lob_budget():
+    mb = 1024**2
+    rows = [(Decimal("1.50"), FakeLob("x" * (mb // 2))) for __ in range(5)]
+    con = FakeConnection(rows + [(None, None)])
+
+    lotes = list(read_lob_lotes(con, "", LOB_SCHEMA, {"lob_batch_mb": 1}))
+
+    assert [len(df) for df in lotes] == [2, 2, 2]
+    tbl = pa.Table.from_pandas(lotes[0], schema=LOB_SCHEMA, preserve_index=False)
+    assert tbl.column("netwr").to_pylist() == [1.5, 1.5]
+
+
+def test_read_lob_lotes_flushes_on_rows(monkeypatch):
+    monkeypatch.setattr(load, "LOB_ROWS", 3)
+    con = FakeConnection([(1, FakeLob("a")) for __ in range(7)])
+
+    lotes = list(read_lob_lotes(con, "", LOB_SCHEMA, dict()))
+
+    assert [len(df) for df in lotes] == [3, 3, 1]
+
+
+def test_read_lob_lotes_counts_cut_values():
+    cut = dict()
+    options = {"lob_max_mb": 1 / 1024**2, "lob_policy": "null"}
+    con = FakeConnection([(1, FakeLob("ab")), (2, FakeLob("a")), (3, FakeLob("abc"))])
+
+    (df,) = read_lob_lotes(con, "", LOB_SCHEMA, options, cut)
+
+    assert df["txt"].tolist() == [None, "a", None]
+    assert cut == {"txt": 2}
@@ -0,0 +1,26 @@
+from etl_saphana_athena.monitor import TableProgress
+
+
+def test_sample_smooths_chunked_progress():
+    """Chunks de 10k linhas por segundo, amostras a 4 Hz: vazao ~10k sem zeros."""
+    table = TableProgress("aws.vbak", started=0.0)
+
+    for tick in range(40):
+        now = tick / 4
+        if tick and tick % 4 == 0:
+            table.rows += 10_000
+            table.bytes += 1_000_000
+        table.sample(now)
+
+    rates = list(table.history)[12:]
+    assert min(rates) >= 6_000
+    assert max(rates) <= 14_000
+    assert " " not in table.sparkline()[12:]
+
+
+def test_sample_first_tick():
+    table = TableProgress("aws.vbak")
+    table.sample(1.0)
+
+    assert table.rows_per_s == 0.0
+    assert not table.history
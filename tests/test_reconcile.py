@@ -0,0 +1,105 @@
+from etl_saphana_athena.reconcile import Metrics, compare, from_athena
+import pyarrow as pa
+
+
+def test_metrics_update_merges_batches():
+    metrics = Metrics()
+    metrics.update(pa.table({"qtd": pa.array([1, None, 3], pa.int32())}))
+    metrics.update(pa.table({"qtd": pa.array([-2, 5], pa.int32())}))
+
+    assert metrics.rows == 5
+    assert metrics.nulls == {"qtd": 1}
+    assert (metrics.mins, metrics.maxs, metrics.sums) == (
+        {"qtd": -2},
+        {"qtd": 5},
+        {"qtd": 7},
+    )
+
+
+def test_compare_equal():
+    stream = Metrics(rows=2, nulls={"a": 0}, sums={"a": 10, "b": 1.5})
+    other = Metrics(rows=2, nulls={"a": 0}, sums={"a": 10, "b": 1.5000001})
+
+    assert compare(stream, other, "HANA") == []
+
+
+def test_compare_integer_is_exact():
+    stream = Metrics(rows=1, sums={"a": 1_000_000_000})
+    other = Metrics(rows=1, sums={"a": 1_000_900_000})
+
+    assert compare(stream, other, "HANA") == [
+        "HANA: sums(a) 1000900000 != 1000000000"
+    ]
+
+
+def test_compare_float_tolerance():
+    stream = Metrics(rows=1, sums={"b": 100.0})
+
+    assert compare(stream, Metrics(rows=1, sums={"b": 100.01}), "HANA") == []
+    assert compare(stream, Metrics(rows=1, sums={"b": 101.0}), "HANA") != []
+
+
+def test_compare_rows_and_nulls():
+    stream = Metrics(rows=3, nulls={"a": 1})
+    other = Metrics(rows=4, nulls={"a": 2, "b": 0})
+
+    assert compare(stream, other, "ATHENA") == [
+        "ATHENA: linhas 4 != 3",
+        "ATHENA: nulls(a) 2 != 1",
+    ]
+
+
+class FakeCursor:
+    def __init__(self, row):
+        self.row = row
+
+    def fetchone(self):
+        return self.row
+
+
+class FakeAthena:
+    def __init__(self, *rows):
+        self.rows = list(rows)
+        self.queries = list()
+
+    def execute(self, query):
+        self.queries.append(query)
+        return FakeCursor(self.rows.pop(0))
+
+
+def test_from_athena_replace():
+    dtype_arrow = pa.schema([("doc", pa.string()), ("qtd", pa.int64())])
+    client = FakeAthena(("3",), (0, 1, -2, 5))
+
+    metrics = from_athena(client, "sap", "vbak", dtype_arrow, "replace")
+
+    assert "null_value_counts, 2" in client.queries[1]
+    assert metrics == Metrics(
+        rows=3, nulls={"doc": 0, "qtd": 1}, mins={"qtd": -2}, maxs={"qtd": 5}
+    )
+
+
+def test_from_athena_append_counts_rows_only():
+    client = FakeAthena(("7",))
+
+    metrics = from_athena(client, "sap", "vbak", pa.schema([]), "append")
+
+    assert metrics == Metrics(rows=7)
+    assert len(client.queries) == 1
+
+
+def test_compare_balanced_float_sums():
+    values = [1234.56, -1234.56] * 100_000
+    stream = Metrics()
+    stream.update(pa.table({"dmbtr": pa.array(values, pa.float32())}))
+    hana = Metrics(rows=len(values), sums={"dmbtr": 0.0})
+
+    assert stream.abs_sums["dmbtr"] > 2e8
+    assert compare(stream, hana, "HANA") == []
+
+
+def test_compare_balanced_float_sums_mismatch():
+    stream = Metrics(rows=2, sums={"dmbtr": 0.0}, abs_sums={"dmbtr": 2000.0})
+    hana = Metrics(rows=2, sums={"dmbtr": 500.0})
+
+    assert compare(stream, hana, "HANA") == ["HANA: sums(dmbtr) 500.0 != 0.0"]